@@ -5,7 +5,9 @@ Following the architecture design from docs/ARCHITECTURE.md
 """
 
 import os
+import re
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 # Component definitions: (name, size_lines, level, responsibility)
 COMPONENTS = [
@@ -31,34 +33,36 @@ COMPONENTS = [
     ("network_stack", 7000, 3, "Main NetworkStack trait implementation, protocol orchestration, message bus integration"),
 ]
 
-def create_component(name, size_lines, level, responsibility):
-    """Create a single component with all necessary files"""
-    print(f"\n📦 Creating component: {name}")
+TEMPLATE_PATH = "claude-orchestration-system/templates/component-generic.md"
 
-    # Create directory structure
-    comp_dir = f"components/{name}"
-    os.makedirs(f"{comp_dir}/src", exist_ok=True)
-    os.makedirs(f"{comp_dir}/tests/unit", exist_ok=True)
-    os.makedirs(f"{comp_dir}/tests/integration", exist_ok=True)
+# Placeholders substituted into the CLAUDE.md template, matched in a single pass
+TEMPLATE_KEYS = (
+    "{{COMPONENT_NAME}}",
+    "{{TECH_STACK}}",
+    "{{CURRENT_TOKENS}}",
+    "{{COMPONENT_RESPONSIBILITY}}",
+    "./",
+)
+TEMPLATE_PATTERN = re.compile("|".join(re.escape(key) for key in TEMPLATE_KEYS))
 
-    # Read template
-    with open("claude-orchestration-system/templates/component-generic.md", "r") as f:
-        template = f.read()
+def create_component(name, size_lines, level, responsibility, template):
+    """Render all files for a single component as (path, content) pairs"""
+    print(f"\n📦 Rendering component: {name}")
+
+    comp_dir = f"components/{name}"
 
     # Replace variables
     estimated_tokens = size_lines * 10  # 10:1 ratio
     tech_stack = "Rust 2021 edition, Tokio async runtime, Cargo build system"
 
-    claude_md = template.replace("{{COMPONENT_NAME}}", name)
-    claude_md = claude_md.replace("{{TECH_STACK}}", tech_stack)
-    claude_md = claude_md.replace("{{CURRENT_TOKENS}}", "0")  # Initially zero
-    claude_md = claude_md.replace("{{COMPONENT_RESPONSIBILITY}}", responsibility)
-    claude_md = claude_md.replace("./", "/home/user/Corten-NetworkStack")
-    claude_md = claude_md.replace("0.1.0", "0.1.0")  # Version from metadata
-
-    # Write CLAUDE.md
-    with open(f"{comp_dir}/CLAUDE.md", "w") as f:
-        f.write(claude_md)
+    substitutions = {
+        "{{COMPONENT_NAME}}": name,
+        "{{TECH_STACK}}": tech_stack,
+        "{{CURRENT_TOKENS}}": "0",  # Initially zero
+        "{{COMPONENT_RESPONSIBILITY}}": responsibility,
+        "./": "/home/user/Corten-NetworkStack",
+    }
+    claude_md = TEMPLATE_PATTERN.sub(lambda m: substitutions[m.group(0)], template)
 
     # Create README.md
     readme = f"""# {name}
@@ -115,9 +119,6 @@ cargo doc --open  # Generate and open documentation
 ```
 """
 
-    with open(f"{comp_dir}/README.md", "w") as f:
-        f.write(readme)
-
     # Create basic Cargo.toml
     cargo_toml = f"""[package]
 name = "{name.replace('_', '-')}"
@@ -140,9 +141,6 @@ name = "integration"
 path = "tests/integration/mod.rs"
 """
 
-    with open(f"{comp_dir}/Cargo.toml", "w") as f:
-        f.write(cargo_toml)
-
     # Create basic lib.rs
     lib_rs = f"""//! {name} component
 //!
@@ -154,28 +152,52 @@ path = "tests/integration/mod.rs"
 // TODO: Implement component
 """
 
-    with open(f"{comp_dir}/src/lib.rs", "w") as f:
-        f.write(lib_rs)
-
-    # Create test file stubs
-    with open(f"{comp_dir}/tests/unit/mod.rs", "w") as f:
-        f.write(f"// Unit tests for {name}\n")
-
-    with open(f"{comp_dir}/tests/integration/mod.rs", "w") as f:
-        f.write(f"// Integration tests for {name}\n")
-
-    print(f"   ✅ Created: {comp_dir}")
-    print(f"   📝 Files: CLAUDE.md, README.md, Cargo.toml, lib.rs, test stubs")
+    return [
+        (f"{comp_dir}/CLAUDE.md", claude_md),
+        (f"{comp_dir}/README.md", readme),
+        (f"{comp_dir}/Cargo.toml", cargo_toml),
+        (f"{comp_dir}/src/lib.rs", lib_rs),
+        # Test file stubs
+        (f"{comp_dir}/tests/unit/mod.rs", f"// Unit tests for {name}\n"),
+        (f"{comp_dir}/tests/integration/mod.rs", f"// Integration tests for {name}\n"),
+    ]
+
+def write_file(item):
+    """Write a single (path, content) pair"""
+    path, content = item
+    with open(path, "w") as f:
+        f.write(content)
+
+def write_files(files, max_workers=8):
+    """Materialize (path, content) pairs, creating all parent directories first"""
+    for directory in sorted({os.path.dirname(path) for path, _ in files}):
+        os.makedirs(directory, exist_ok=True)
+
+    # Files are independent, so write them concurrently; list() re-raises
+    # the first write error
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(write_file, files))
 
 def main():
     print("=" * 70)
     print("Creating 13 Network Stack Components")
     print("=" * 70)
 
+    # Read template once for all components
+    with open(TEMPLATE_PATH, "r") as f:
+        template = f.read()
+
+    # Render every component first, then write all files in one pass
+    files = []
     for name, size_lines, level, responsibility in COMPONENTS:
-        create_component(name, size_lines, level, responsibility)
+        files.extend(create_component(name, size_lines, level, responsibility, template))
+
+    write_files(files)
+    print(f"\n📝 Wrote {len(files)} files (CLAUDE.md, README.md, Cargo.toml, lib.rs, test stubs)")
 
-    # Add all to git
+    # Add all to git in a single call. Any future per-component git
+    # operations must be aggregated into one invocation like this rather
+    # than spawning a git process per component.
     print("\n📌 Adding components to git repository...")
     subprocess.run(["git", "add", "components/"], check=False)
 
@@ -2,254 +2,479 @@
 """
 Minimal HTTP test server for NetworkStack testing
 Provides endpoints similar to httpbin.org for local testing
+
+Usage: python3 test_server.py [port]
+
+Only the standard library is required, so the server should also run
+under PyPy (pypy3 test_server.py [port]); this has not been tested, and
+no throughput difference has been measured. orjson is used when
+installed and otherwise falls back to the stdlib json module.
 """
 
 import json
+import re
 import time
 import gzip
 import zlib
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
 import sys
 
+# orjson serializes straight to UTF-8 bytes; the stdlib is used if it is absent
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dumps(data):
+    """Serialize data to compact UTF-8 JSON bytes
+
+    orjson writes non-ASCII text as raw UTF-8. The stdlib fallback keeps the
+    default \\u escapes, which also covers lone surrogates that can't be
+    encoded as UTF-8.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits or lone surrogates, which the
+            # stdlib encoder handles
+            pass
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+# Chunk sizes in a chunked request body are plain hex digits, nothing else
+_CHUNK_SIZE_RE = re.compile(rb'[0-9A-Fa-f]+')
+
+# Default CORS policy, shared by add_cors_headers() and its pre-encoded form
+_CORS_ALLOW_ORIGIN = '*'
+_CORS_ALLOW_METHODS = 'GET, POST, PUT, DELETE, OPTIONS'
+_CORS_ALLOW_HEADERS = '*'
+_CORS_MAX_AGE = '86400'
+
+def _headers_to_dict(msg):
+    """Copy request headers in a single pass over the message's header list"""
+    return dict(msg.items())
+
+def _forbids_body(status_code):
+    """Return True for status codes whose responses never carry a body"""
+    return status_code < 200 or status_code in (204, 304)
+
+def _encode_status_line(protocol_version, status_code):
+    """Pre-encode the status line for a response"""
+    return f'{protocol_version} {status_code} {BaseHTTPRequestHandler.responses[status_code][0]}\r\n'.encode('latin-1')
+
+def _encode_head(protocol_version, status_code, content_type, body, extra_headers=()):
+    """Pre-encode the status line and trailing headers for a constant response
+
+    Returns a (status_line, headers) pair; _send_raw() puts the per-response
+    Server and Date headers between the two.
+    """
+    lines = [f'{name}: {value}\r\n' for name, value in extra_headers]
+    lines.append(f'Content-Type: {content_type}\r\n')
+    lines.append(f'Content-Length: {len(body)}\r\n\r\n')
+    return _encode_status_line(protocol_version, status_code), ''.join(lines).encode('latin-1')
+
+def _encode_status_responses(protocol_version, status_codes):
+    """Pre-encode (status_line, headers) pairs for empty-bodied responses"""
+    responses = {}
+    for status_code in status_codes:
+        headers = b'\r\n' if _forbids_body(status_code) else b'Content-Length: 0\r\n\r\n'
+        responses[status_code] = (_encode_status_line(protocol_version, status_code), headers)
+    return responses
+
 class TestRequestHandler(BaseHTTPRequestHandler):
+    # Persistent connections: every response must carry a Content-Length
+    # (or a status that forbids a body). Also used for the status line of
+    # the pre-encoded responses below.
+    protocol_version = 'HTTP/1.1'
+
+    # Constant response bodies, encoded (and compressed) once at class load in
+    # the same compact JSON style as the dynamic responses
+    _JSON_BODY = _dumps({
+        'slideshow': {
+            'title': 'Sample Slide Show',
+            'slides': [
+                {'title': 'Wake up to WonderWidgets!', 'type': 'all'}
+            ]
+        }
+    })
+    _HTML_BODY = b'<!DOCTYPE html><html><body><h1>Test HTML</h1></body></html>'
+    # Compression runs only once, so use the highest level for the smallest payloads
+    _GZIP_BODY = gzip.compress(_dumps({'gzipped': True, 'method': 'GET'}),
+                               compresslevel=9)
+    _DEFLATE_BODY = zlib.compress(_dumps({'deflated': True, 'method': 'GET'}),
+                                  level=9)
+    _UTF8_BODY = 'Hello World! 你好世界! Привет мир! مرحبا بالعالم!'.encode('utf-8')
+    _CACHED_BODY = _dumps({'cached': True})
+    _CORS_BLOCKED_BODY = _dumps({'cors': 'blocked'})
+    _CORS_CUSTOM_METHOD_BODY = _dumps({'cors': 'custom-method'})
+    _CSP_DEFAULT_SRC_BODY = _dumps({'csp': 'default-src'})
+    _CSP_SCRIPT_SRC_BODY = _dumps({'csp': 'script-src'})
+    _CSP_HASH_BODY = _dumps({'csp': 'hash'})
+    _CSP_MULTIPLE_BODY = _dumps({'csp': 'multiple'})
+    _CSP_REPORT_URI_BODY = _dumps({'csp': 'report-uri'})
+    _CSP_REPORT_BODY = _dumps({'received': 'report'})
+
+    # Default CORS headers, as emitted by add_cors_headers(), plus their wire encoding
+    _CORS_HEADERS = (
+        ('Access-Control-Allow-Origin', _CORS_ALLOW_ORIGIN),
+        ('Access-Control-Allow-Methods', _CORS_ALLOW_METHODS),
+        ('Access-Control-Allow-Headers', _CORS_ALLOW_HEADERS),
+        ('Access-Control-Max-Age', _CORS_MAX_AGE),
+    )
+    _CORS_HEADER_BLOCK = ''.join(f'{name}: {value}\r\n' for name, value in _CORS_HEADERS).encode('latin-1')
+
+    # SHA-256 hash of "alert('test')"
+    _CSP_HASH_VALUE = "sha256-qznLcsROx4GACP2dm0UCKCzCG+HiZ1guq6ZZDob/Tng="
+
+    # Status line and headers for each constant body, written by _send_raw()
+    _JSON_HEAD = _encode_head(protocol_version, 200, 'application/json', _JSON_BODY)
+    _HTML_HEAD = _encode_head(protocol_version, 200, 'text/html', _HTML_BODY)
+    _GZIP_HEAD = _encode_head(protocol_version, 200, 'application/json', _GZIP_BODY,
+                              (('Content-Encoding', 'gzip'),))
+    _DEFLATE_HEAD = _encode_head(protocol_version, 200, 'application/json', _DEFLATE_BODY,
+                                 (('Content-Encoding', 'deflate'),))
+    _UTF8_HEAD = _encode_head(protocol_version, 200, 'text/html; charset=utf-8', _UTF8_BODY)
+    _CORS_BLOCKED_HEAD = _encode_head(protocol_version, 200, 'application/json', _CORS_BLOCKED_BODY)
+    _CORS_CUSTOM_METHOD_HEAD = _encode_head(protocol_version, 200, 'application/json',
+                                            _CORS_CUSTOM_METHOD_BODY, _CORS_HEADERS)
+    _CSP_DEFAULT_SRC_HEAD = _encode_head(protocol_version, 200, 'application/json', _CSP_DEFAULT_SRC_BODY,
+                                         (('Content-Security-Policy', "default-src 'self'"),))
+    _CSP_SCRIPT_SRC_HEAD = _encode_head(protocol_version, 200, 'application/json', _CSP_SCRIPT_SRC_BODY,
+                                        (('Content-Security-Policy', "script-src 'self'"),))
+    _CSP_HASH_HEAD = _encode_head(protocol_version, 200, 'application/json', _CSP_HASH_BODY,
+                                  (('Content-Security-Policy', f"script-src '{_CSP_HASH_VALUE}'"),))
+    _CSP_MULTIPLE_HEAD = _encode_head(protocol_version, 200, 'application/json', _CSP_MULTIPLE_BODY,
+                                      (('Content-Security-Policy', "default-src 'self'; script-src 'self' 'unsafe-inline'; style-src 'self' 'unsafe-inline'"),))
+    _CSP_REPORT_URI_HEAD = _encode_head(protocol_version, 200, 'application/json', _CSP_REPORT_URI_BODY,
+                                        (('Content-Security-Policy', "default-src 'self'; report-uri /csp/report"),))
+    _CSP_REPORT_HEAD = _encode_head(protocol_version, 200, 'application/json', _CSP_REPORT_BODY)
+
+    # Complete responses for the commonly requested /status/<code> values
+    _STATUS_RESPONSES = _encode_status_responses(protocol_version, (
+        200, 201, 204, 301, 302, 400, 401, 403, 404, 418, 500, 502, 503,
+    ))
+
+    # (second, encoded Server and Date headers), shared by all handler threads
+    _server_date_cache = (None, b'')
+
     def log_message(self, format, *args):
         """Suppress default logging"""
         pass
 
-    def add_cors_headers(self, origin='*', methods='GET, POST, PUT, DELETE, OPTIONS', headers='*', credentials=False):
-        """Add CORS headers to response"""
-        self.send_header('Access-Control-Allow-Origin', origin if not credentials else self.headers.get('Origin', origin))
+    def send_header_block(self, block):
+        """Queue pre-encoded bytes behind the headers, skipping send_header()'s encoding
+
+        This is the only method that touches BaseHTTPRequestHandler's private
+        _headers_buffer, the list send_header() appends to and flush_headers()
+        writes out in one call.
+        """
+        if self.request_version != 'HTTP/0.9':
+            self._headers_buffer.append(block)
+
+    def end_headers(self, body=b''):
+        """Finish the buffered header block and send it together with body in one write"""
+        if self.request_version != 'HTTP/0.9':
+            self.send_header_block(b'\r\n')
+            if body:
+                self.send_header_block(body)
+            self.flush_headers()
+        elif body:
+            self.wfile.write(body)
+
+    def add_cors_headers(self, origin=_CORS_ALLOW_ORIGIN, methods=_CORS_ALLOW_METHODS,
+                         headers=_CORS_ALLOW_HEADERS, credentials=False):
+        """Add CORS headers to response (credentialed callers pass the request Origin)"""
+        self.send_header('Access-Control-Allow-Origin', origin)
         self.send_header('Access-Control-Allow-Methods', methods)
         self.send_header('Access-Control-Allow-Headers', headers)
         if credentials:
             self.send_header('Access-Control-Allow-Credentials', 'true')
-        self.send_header('Access-Control-Max-Age', '86400')
+        self.send_header('Access-Control-Max-Age', _CORS_MAX_AGE)
 
     def add_csp_header(self, policy):
         """Add Content-Security-Policy header"""
         self.send_header('Content-Security-Policy', policy)
 
+    def read_body(self):
+        """Read the whole request body so the next request on the connection starts cleanly
+
+        Every do_* method calls this, even when the body is ignored, because
+        unread bytes would otherwise be parsed as the next request.
+        """
+        transfer_encoding = self.headers.get('Transfer-Encoding')
+        if transfer_encoding is not None:
+            if transfer_encoding.strip().lower() == 'chunked':
+                return self._read_chunked_body()
+            # The body length can't be determined, so stop reusing the connection
+            self.close_connection = True
+            return b''
+
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            self.close_connection = True
+            return b''
+        return self.rfile.read(content_length)
+
+    def _read_chunked_body(self):
+        """Decode a chunked request body, discarding any trailer fields
+
+        Framing is checked strictly; on any violation the rest of the stream
+        can't be trusted, so the connection is closed after this response.
+        """
+        chunks = []
+        while True:
+            line = self.rfile.readline(65537)
+            size_field = line[:-2].split(b';', 1)[0]
+            if not line.endswith(b'\r\n') or not _CHUNK_SIZE_RE.fullmatch(size_field):
+                self.close_connection = True
+                return b''.join(chunks)
+            size = int(size_field, 16)
+            if size == 0:
+                break
+            data = self.rfile.read(size)
+            # Every chunk's data must be complete and followed by exactly CRLF
+            if len(data) != size or self.rfile.read(2) != b'\r\n':
+                self.close_connection = True
+                return b''.join(chunks)
+            chunks.append(data)
+
+        while True:
+            line = self.rfile.readline(65537)
+            if line == b'\r\n':
+                break
+            if not line.endswith(b'\r\n'):
+                self.close_connection = True
+                break
+        return b''.join(chunks)
+
+    def send_empty_response(self, status_code, headers=()):
+        """Send a response without a body"""
+        if status_code < 200:
+            # A 1xx is only an interim response and no final one follows, so
+            # close the connection instead of leaving the client waiting
+            self.close_connection = True
+        self.send_response(status_code)
+        for name, value in headers:
+            self.send_header(name, value)
+        if not _forbids_body(status_code):
+            self.send_header('Content-Length', '0')
+        self.end_headers()
+
     def send_json_response(self, status_code, data, cors=False, csp=None):
         """Send JSON response"""
-        response = json.dumps(data).encode('utf-8')
+        response = _dumps(data)
         self.send_response(status_code)
         if cors:
-            self.add_cors_headers()
+            self.send_header_block(self._CORS_HEADER_BLOCK)
         if csp:
             self.add_csp_header(csp)
         self.send_header('Content-Type', 'application/json')
         self.send_header('Content-Length', str(len(response)))
-        self.end_headers()
-        self.wfile.write(response)
+        self.end_headers(response)
+
+    def _server_date_headers(self):
+        """Return the Server and Date header lines, re-formatted at most once a second"""
+        now = int(time.time())
+        cached_at, headers = TestRequestHandler._server_date_cache
+        if cached_at != now:
+            headers = (f'Server: {self.version_string()}\r\n'
+                       f'Date: {self.date_time_string(now)}\r\n').encode('latin-1')
+            TestRequestHandler._server_date_cache = (now, headers)
+        return headers
+
+    def _send_raw(self, head, body=b''):
+        """Send a pre-encoded (status_line, headers) pair and body, bypassing send_header()
+
+        The Server and Date headers are added as send_response() would.
+        """
+        status_line, headers = head
+        self.wfile.write(b''.join((status_line, self._server_date_headers(), headers, body)))
 
     def send_text_response(self, status_code, text, content_type='text/plain', cors=False, csp=None):
         """Send text response"""
         response = text.encode('utf-8')
         self.send_response(status_code)
         if cors:
-            self.add_cors_headers()
+            self.send_header_block(self._CORS_HEADER_BLOCK)
         if csp:
             self.add_csp_header(csp)
         self.send_header('Content-Type', content_type)
         self.send_header('Content-Length', str(len(response)))
-        self.end_headers()
-        self.wfile.write(response)
+        self.end_headers(response)
+
+    # === GET route handlers (dispatched from do_GET via _EXACT/_PREFIX) ===
+
+    # /get - Basic GET endpoint
+    def _handle_get(self, pr):
+        self.send_json_response(200, {
+            'method': 'GET',
+            'url': f'http://{self.headers.get("Host")}{self.path}',
+            'headers': _headers_to_dict(self.headers)
+        })
+
+    # /status/<code> - Return specific status code
+    def _handle_status(self, pr, arg):
+        try:
+            status_code = int(arg)
+        except ValueError:
+            self.send_empty_response(400)
+            return
+
+        response = self._STATUS_RESPONSES.get(status_code)
+        if response is not None:
+            self._send_raw(response)
+        else:
+            self.send_empty_response(status_code)
+
+    # /headers - Return request headers
+    def _handle_headers(self, pr):
+        self.send_json_response(200, {
+            'headers': _headers_to_dict(self.headers)
+        })
+
+    # /response-headers - Return with specific response headers
+    def _handle_response_headers(self, pr):
+        query = parse_qs(pr.query)
+        content_type = query.get('Content-Type', ['application/json'])[0]
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', '2')
+        self.end_headers(b'{}')
+
+    # /redirect/<n> - Redirect chain
+    def _handle_redirect(self, pr, arg):
+        try:
+            remaining = int(arg)
+            if remaining > 1:
+                self.send_empty_response(302, (('Location', f'/redirect/{remaining - 1}'),))
+            else:
+                self.send_json_response(200, {'redirected': True})
+        except ValueError:
+            self.send_empty_response(400)
+
+    # /json - Return JSON
+    def _handle_json(self, pr):
+        self._send_raw(self._JSON_HEAD, self._JSON_BODY)
+
+    # /html - Return HTML
+    def _handle_html(self, pr):
+        self._send_raw(self._HTML_HEAD, self._HTML_BODY)
+
+    # /gzip - Return gzip-compressed response
+    def _handle_gzip(self, pr):
+        self._send_raw(self._GZIP_HEAD, self._GZIP_BODY)
+
+    # /deflate - Return deflate-compressed response
+    def _handle_deflate(self, pr):
+        self._send_raw(self._DEFLATE_HEAD, self._DEFLATE_BODY)
+
+    # /encoding/utf8 - UTF-8 content
+    def _handle_encoding_utf8(self, pr):
+        self._send_raw(self._UTF8_HEAD, self._UTF8_BODY)
+
+    # /cache/<seconds> - Cache control
+    def _handle_cache(self, pr, arg):
+        try:
+            seconds = int(arg)
+            self.send_response(200)
+            self.send_header('Cache-Control', f'public, max-age={seconds}')
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(self._CACHED_BODY)))
+            self.end_headers(self._CACHED_BODY)
+        except ValueError:
+            self.send_empty_response(400)
+
+    # /delay/<seconds> - Delayed response
+    def _handle_delay(self, pr, arg):
+        try:
+            delay = int(arg)
+            time.sleep(delay)
+            self.send_json_response(200, {'delayed': delay})
+        except ValueError:
+            self.send_empty_response(400)
+
+    # === CORS Endpoints ===
+    # /cors/simple - Simple CORS request
+    def _handle_cors_simple(self, pr):
+        self.send_json_response(200, {
+            'cors': 'simple',
+            'origin': self.headers.get('Origin', 'none')
+        }, cors=True)
+
+    # /cors/credentials - CORS with credentials
+    def _handle_cors_credentials(self, pr):
+        origin = self.headers.get('Origin', '*')
+        self.send_response(200)
+        self.add_cors_headers(origin=origin, credentials=True)
+        self.send_header('Content-Type', 'application/json')
+        response = _dumps({'cors': 'credentials', 'origin': origin})
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers(response)
 
-    def do_GET(self):
-        """Handle GET requests"""
-        path = urlparse(self.path).path
-        query = parse_qs(urlparse(self.path).query)
+    # /cors/no-headers - No CORS headers (should fail)
+    def _handle_cors_no_headers(self, pr):
+        self._send_raw(self._CORS_BLOCKED_HEAD, self._CORS_BLOCKED_BODY)
 
-        # /get - Basic GET endpoint
-        if path == '/get':
-            self.send_json_response(200, {
-                'method': 'GET',
-                'url': f'http://{self.headers.get("Host")}{self.path}',
-                'headers': dict(self.headers)
-            })
+    # /cors/custom-method - Custom method test
+    def _handle_cors_custom_method(self, pr):
+        self._send_raw(self._CORS_CUSTOM_METHOD_HEAD, self._CORS_CUSTOM_METHOD_BODY)
 
-        # /status/<code> - Return specific status code
-        elif path.startswith('/status/'):
-            try:
-                status_code = int(path.split('/')[-1])
-                self.send_response(status_code)
-                self.end_headers()
-            except ValueError:
-                self.send_response(400)
-                self.end_headers()
-
-        # /headers - Return request headers
-        elif path == '/headers':
-            self.send_json_response(200, {
-                'headers': dict(self.headers)
-            })
+    # === CSP Endpoints ===
+    # /csp/default-src - Test default-src directive
+    def _handle_csp_default_src(self, pr):
+        self._send_raw(self._CSP_DEFAULT_SRC_HEAD, self._CSP_DEFAULT_SRC_BODY)
 
-        # /response-headers - Return with specific response headers
-        elif path == '/response-headers':
-            content_type = query.get('Content-Type', ['application/json'])[0]
-            self.send_response(200)
-            self.send_header('Content-Type', content_type)
-            self.end_headers()
-            self.wfile.write(b'{}')
+    # /csp/script-src - Test script-src directive
+    def _handle_csp_script_src(self, pr):
+        self._send_raw(self._CSP_SCRIPT_SRC_HEAD, self._CSP_SCRIPT_SRC_BODY)
 
-        # /redirect/<n> - Redirect chain
-        elif path.startswith('/redirect/'):
-            try:
-                remaining = int(path.split('/')[-1])
-                if remaining > 1:
-                    self.send_response(302)
-                    self.send_header('Location', f'/redirect/{remaining - 1}')
-                    self.end_headers()
-                else:
-                    self.send_json_response(200, {'redirected': True})
-            except ValueError:
-                self.send_response(400)
-                self.end_headers()
-
-        # /json - Return JSON
-        elif path == '/json':
-            self.send_json_response(200, {
-                'slideshow': {
-                    'title': 'Sample Slide Show',
-                    'slides': [
-                        {'title': 'Wake up to WonderWidgets!', 'type': 'all'}
-                    ]
-                }
-            })
+    # /csp/nonce/<nonce> - Test nonce-based CSP
+    def _handle_csp_nonce(self, pr, nonce):
+        self.send_json_response(200, {'csp': 'nonce', 'nonce': nonce},
+                                csp=f"script-src 'nonce-{nonce}'")
 
-        # /html - Return HTML
-        elif path == '/html':
-            self.send_text_response(200,
-                '<!DOCTYPE html><html><body><h1>Test HTML</h1></body></html>',
-                'text/html')
+    # /csp/hash - Test hash-based CSP
+    def _handle_csp_hash(self, pr):
+        self._send_raw(self._CSP_HASH_HEAD, self._CSP_HASH_BODY)
 
-        # /gzip - Return gzip-compressed response
-        elif path == '/gzip':
-            data = json.dumps({'gzipped': True, 'method': 'GET'}).encode('utf-8')
-            compressed = gzip.compress(data)
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Encoding', 'gzip')
-            self.send_header('Content-Length', str(len(compressed)))
-            self.end_headers()
-            self.wfile.write(compressed)
-
-        # /deflate - Return deflate-compressed response
-        elif path == '/deflate':
-            data = json.dumps({'deflated': True, 'method': 'GET'}).encode('utf-8')
-            compressed = zlib.compress(data)
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Encoding', 'deflate')
-            self.send_header('Content-Length', str(len(compressed)))
-            self.end_headers()
-            self.wfile.write(compressed)
+    # /csp/multiple - Multiple CSP directives
+    def _handle_csp_multiple(self, pr):
+        self._send_raw(self._CSP_MULTIPLE_HEAD, self._CSP_MULTIPLE_BODY)
 
-        # /encoding/utf8 - UTF-8 content
-        elif path == '/encoding/utf8':
-            self.send_text_response(200,
-                'Hello World! 你好世界! Привет мир! مرحبا بالعالم!',
-                'text/html; charset=utf-8')
+    # /csp/report-uri - CSP with report-uri
+    def _handle_csp_report_uri(self, pr):
+        self._send_raw(self._CSP_REPORT_URI_HEAD, self._CSP_REPORT_URI_BODY)
 
-        # /cache/<seconds> - Cache control
-        elif path.startswith('/cache/'):
-            try:
-                seconds = int(path.split('/')[-1])
-                self.send_response(200)
-                self.send_header('Cache-Control', f'public, max-age={seconds}')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({'cached': True}).encode('utf-8'))
-            except ValueError:
-                self.send_response(400)
-                self.end_headers()
-
-        # /delay/<seconds> - Delayed response
-        elif path.startswith('/delay/'):
-            try:
-                delay = int(path.split('/')[-1])
-                time.sleep(delay)
-                self.send_json_response(200, {'delayed': delay})
-            except ValueError:
-                self.send_response(400)
-                self.end_headers()
-
-        # === CORS Endpoints ===
-        # /cors/simple - Simple CORS request
-        elif path == '/cors/simple':
-            self.send_json_response(200, {
-                'cors': 'simple',
-                'origin': self.headers.get('Origin', 'none')
-            }, cors=True)
-
-        # /cors/credentials - CORS with credentials
-        elif path == '/cors/credentials':
-            origin = self.headers.get('Origin', '*')
-            self.send_response(200)
-            self.add_cors_headers(origin=origin, credentials=True)
-            self.send_header('Content-Type', 'application/json')
-            response = json.dumps({'cors': 'credentials', 'origin': origin}).encode('utf-8')
-            self.send_header('Content-Length', str(len(response)))
-            self.end_headers()
-            self.wfile.write(response)
-
-        # /cors/no-headers - No CORS headers (should fail)
-        elif path == '/cors/no-headers':
-            self.send_json_response(200, {'cors': 'blocked'})
-
-        # /cors/custom-method - Custom method test
-        elif path == '/cors/custom-method':
-            self.send_json_response(200, {'cors': 'custom-method'}, cors=True)
-
-        # === CSP Endpoints ===
-        # /csp/default-src - Test default-src directive
-        elif path == '/csp/default-src':
-            self.send_json_response(200, {'csp': 'default-src'},
-                                    csp="default-src 'self'")
-
-        # /csp/script-src - Test script-src directive
-        elif path == '/csp/script-src':
-            self.send_json_response(200, {'csp': 'script-src'},
-                                    csp="script-src 'self'")
-
-        # /csp/nonce - Test nonce-based CSP
-        elif path.startswith('/csp/nonce/'):
-            nonce = path.split('/')[-1]
-            self.send_json_response(200, {'csp': 'nonce', 'nonce': nonce},
-                                    csp=f"script-src 'nonce-{nonce}'")
-
-        # /csp/hash - Test hash-based CSP
-        elif path == '/csp/hash':
-            # SHA-256 hash of "alert('test')"
-            hash_value = "sha256-qznLcsROx4GACP2dm0UCKCzCG+HiZ1guq6ZZDob/Tng="
-            self.send_json_response(200, {'csp': 'hash'},
-                                    csp=f"script-src '{hash_value}'")
-
-        # /csp/multiple - Multiple CSP directives
-        elif path == '/csp/multiple':
-            self.send_json_response(200, {'csp': 'multiple'},
-                                    csp="default-src 'self'; script-src 'self' 'unsafe-inline'; style-src 'self' 'unsafe-inline'")
-
-        # /csp/report-uri - CSP with report-uri
-        elif path == '/csp/report-uri':
-            self.send_json_response(200, {'csp': 'report-uri'},
-                                    csp="default-src 'self'; report-uri /csp/report")
-
-        # /csp/report - CSP violation report endpoint
-        elif path == '/csp/report':
-            self.send_json_response(200, {'received': 'report'})
+    # /csp/report - CSP violation report endpoint
+    def _handle_csp_report(self, pr):
+        self._send_raw(self._CSP_REPORT_HEAD, self._CSP_REPORT_BODY)
 
+    def do_GET(self):
+        """Handle GET requests"""
+        self.read_body()
+        pr = urlsplit(self.path)
+        path = pr.path
+
+        handler = _EXACT.get(path)
+        if handler is not None:
+            handler(self, pr)
+            return
+
+        m = _PREFIX_RE.match(path)
+        if m is not None:
+            _PREFIX[m.group(1)](self, pr, m.group(2))
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_empty_response(404)
 
     def do_POST(self):
         """Handle POST requests"""
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length)
+        body = self.read_body()
 
-        path = urlparse(self.path).path
+        path = urlsplit(self.path).path
 
         if path == '/post':
             try:
@@ -260,54 +485,52 @@ class TestRequestHandler(BaseHTTPRequestHandler):
             self.send_json_response(200, {
                 'method': 'POST',
                 'url': f'http://{self.headers.get("Host")}{self.path}',
-                'headers': dict(self.headers),
+                'headers': _headers_to_dict(self.headers),
                 'json': data
             })
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_empty_response(404)
 
     def do_PUT(self):
         """Handle PUT requests"""
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length)
+        body = self.read_body()
 
-        if urlparse(self.path).path == '/put':
+        if urlsplit(self.path).path == '/put':
             self.send_json_response(200, {
                 'method': 'PUT',
                 'data': body.decode('utf-8', errors='replace')
             })
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_empty_response(404)
 
     def do_DELETE(self):
         """Handle DELETE requests"""
-        if urlparse(self.path).path == '/delete':
+        self.read_body()
+
+        if urlsplit(self.path).path == '/delete':
             self.send_json_response(200, {
                 'method': 'DELETE'
             })
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_empty_response(404)
 
     def do_PATCH(self):
         """Handle PATCH requests"""
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length)
+        body = self.read_body()
 
-        if urlparse(self.path).path == '/patch':
+        if urlsplit(self.path).path == '/patch':
             self.send_json_response(200, {
                 'method': 'PATCH',
                 'data': body.decode('utf-8', errors='replace')
             })
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_empty_response(404)
 
     def do_OPTIONS(self):
         """Handle OPTIONS requests (CORS preflight)"""
-        path = urlparse(self.path).path
+        self.read_body()
+
+        path = urlsplit(self.path).path
 
         # CORS preflight for all /cors/* endpoints
         if path.startswith('/cors/'):
@@ -326,23 +549,50 @@ class TestRequestHandler(BaseHTTPRequestHandler):
                     credentials=True
                 )
             else:
-                self.add_cors_headers(
-                    origin='*',
-                    methods='GET, POST, PUT, DELETE, OPTIONS',
-                    headers=requested_headers
-                )
+                self.add_cors_headers(headers=requested_headers)
 
             self.end_headers()
         else:
             # Standard OPTIONS response
-            self.send_response(200)
-            self.send_header('Allow', 'GET, POST, PUT, DELETE, PATCH, OPTIONS')
-            self.end_headers()
+            self.send_empty_response(200, (('Allow', 'GET, POST, PUT, DELETE, PATCH, OPTIONS'),))
+
+# GET routing: exact paths are a single dict lookup, parameterised routes
+# are demultiplexed by one regex match on /<route>/<arg>
+_EXACT = {
+    '/get': TestRequestHandler._handle_get,
+    '/headers': TestRequestHandler._handle_headers,
+    '/response-headers': TestRequestHandler._handle_response_headers,
+    '/json': TestRequestHandler._handle_json,
+    '/html': TestRequestHandler._handle_html,
+    '/gzip': TestRequestHandler._handle_gzip,
+    '/deflate': TestRequestHandler._handle_deflate,
+    '/encoding/utf8': TestRequestHandler._handle_encoding_utf8,
+    '/cors/simple': TestRequestHandler._handle_cors_simple,
+    '/cors/credentials': TestRequestHandler._handle_cors_credentials,
+    '/cors/no-headers': TestRequestHandler._handle_cors_no_headers,
+    '/cors/custom-method': TestRequestHandler._handle_cors_custom_method,
+    '/csp/default-src': TestRequestHandler._handle_csp_default_src,
+    '/csp/script-src': TestRequestHandler._handle_csp_script_src,
+    '/csp/hash': TestRequestHandler._handle_csp_hash,
+    '/csp/multiple': TestRequestHandler._handle_csp_multiple,
+    '/csp/report-uri': TestRequestHandler._handle_csp_report_uri,
+    '/csp/report': TestRequestHandler._handle_csp_report,
+}
+
+_PREFIX = {
+    'status': TestRequestHandler._handle_status,
+    'redirect': TestRequestHandler._handle_redirect,
+    'cache': TestRequestHandler._handle_cache,
+    'delay': TestRequestHandler._handle_delay,
+    'csp/nonce': TestRequestHandler._handle_csp_nonce,
+}
+
+_PREFIX_RE = re.compile(r'/(status|redirect|cache|delay|csp/nonce)/([^/]*)\Z')
 
 def run_server(port=8080):
     """Run the test server"""
     server_address = ('127.0.0.1', port)
-    httpd = HTTPServer(server_address, TestRequestHandler)
+    httpd = ThreadingHTTPServer(server_address, TestRequestHandler)
     print(f'Starting test server on http://127.0.0.1:{port}/')
     print('Press Ctrl+C to stop')
     try: